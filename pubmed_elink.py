@@ -7,20 +7,39 @@ Ranks candidates by how many seed papers link to them.
 
 Peter L. Morrell - January 2026 - St. Paul, MN
 Adapted from Shell script for better data structure handling and maintainability.
+
+Related articles are queried concurrently against the E-utilities HTTP
+endpoint (requires aiohttp, numpy, and pandas). Set NCBI_API_KEY in the environment to raise
+the NCBI rate limit from 3 to 10 requests per second. If the optional
+hyperscan package is installed it is used for content filtering.
 """
 
 import sys
 import os
-import subprocess
-import tempfile
-import shutil
+import asyncio
+import json
+import random
+import sqlite3
+import time
+import zlib
+from array import array
 import re
+import xml.etree.ElementTree as ET
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import Counter, defaultdict
 import argparse
 from typing import Dict, List, Set, Tuple, Optional
 
+import aiohttp
+import numpy as np
+import pandas as pd
+
+try:
+    import hyperscan
+except ImportError:  # Optional; content filtering falls back to re
+    hyperscan = None
+
 
 # ============================================================================
 # SEED LISTS AND CONFIGURATION (Lines 94-101 from shell version)
@@ -72,6 +91,69 @@ EXCLUDE_PMIDS = [
 
 MIN_PMID = 21980108  # Exclude older papers
 
+# Sorted, unique PMIDs already curated (included or excluded), for
+# vectorized membership tests against each seed's related PMIDs
+KNOWN_PMIDS = np.union1d(
+    np.array(INCLUDE_PMIDS, dtype=np.int64),
+    np.array(EXCLUDE_PMIDS, dtype=np.int64)
+)
+
+EUTILS_BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+NCBI_API_KEY = os.environ.get("NCBI_API_KEY", "")
+
+# NCBI allows 10 requests/second with an API key, 3 without
+REQUESTS_PER_SECOND = 10 if NCBI_API_KEY else 3
+MAX_CONCURRENT_REQUESTS = REQUESTS_PER_SECOND
+MAX_RETRIES = 4  # Retries per request after 429/5xx or connection errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+HTTP_POOL_SIZE = 16  # Keep-alive connections shared by all E-utilities requests
+ELINK_BATCH_SIZE = 100  # Seed PMIDs per elink request
+EFETCH_BATCH_SIZE = 500  # Records per efetch page from the history server
+
+CACHE_FILENAME = "pubmed_cache.sqlite"
+
+
+# ============================================================================
+# CONTENT FILTER PATTERNS
+# ============================================================================
+
+POS_PATTERNS = r"whole[\s\-]?genome|WGS|resequenc"
+NEG_PATTERNS = r"0K-exome|targeted|amplicon|panel|GBS|genotyping(\s+by\s+sequencing)?|GenomeStudio|SNP([\s\-]?array)?|microarray|Infinium|Axiom|expression|transcriptome|RNA[\s\-]?seq|mRNA|SSR(s)?|microsatellite|RAD[\s\-]?seq|ddRAD|SLAF|reduced\s+representation|capture|hybrid[\s\-]?capture|chloroplast|mitochondri|mitochondrial\s+genome|plastid|plastome|mitogenome"
+EXCL_PT = r"Review|Editorial|Letter|Meta-Analysis|News|Comment"
+COMPARATIVE_PATTERNS = r"variant|polymorphism|SNP|indel|SV|structural\s+variant|copy\s+number|CNV|haplotype|diversity|population|comparative|resequenc|association|GWAS|selection|adaptation|introgression|domestication|pangenome|pan[\s\-]?genome|phylogeny|evolution"
+ASSEMBLY_PATTERNS = r"(de[\s\-]?novo\s+)?assembly|genome\s+assembly"
+
+# Title/abstract patterns, keyed by the name used for each group of hits
+CONTENT_PATTERNS = {
+    "pos": POS_PATTERNS,
+    "neg": NEG_PATTERNS,
+    "comp": COMPARATIVE_PATTERNS,
+    "asm": ASSEMBLY_PATTERNS,
+}
+
+_EXCL_PT_RE = re.compile(EXCL_PT, re.IGNORECASE)
+_CONTENT_RES = {
+    name: re.compile(pattern, re.IGNORECASE)
+    for name, pattern in CONTENT_PATTERNS.items()
+}
+# All content patterns as named alternatives, so each text is scanned once
+_CONTENT_RE = re.compile(
+    "|".join(f"(?P<{name}>{pattern})" for name, pattern in CONTENT_PATTERNS.items()),
+    re.IGNORECASE
+)
+
+# With Hyperscan available, all content patterns compile into one database
+# that reports every matching group in a single linear scan
+_CONTENT_NAMES = list(CONTENT_PATTERNS)
+_CONTENT_DB = None
+if hyperscan is not None:
+    _CONTENT_DB = hyperscan.Database()
+    _CONTENT_DB.compile(
+        expressions=[pattern.encode() for pattern in CONTENT_PATTERNS.values()],
+        ids=list(range(len(_CONTENT_NAMES))),
+        flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SINGLEMATCH] * len(_CONTENT_NAMES)
+    )
+
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -83,153 +165,383 @@ def log(message: str):
     print(f"[{timestamp}] {message}")
 
 
-def run_command(cmd: List[str], input_text: Optional[str] = None) -> Tuple[str, int]:
-    """Run shell command and return stdout and exit code."""
-    try:
-        result = subprocess.run(
-            cmd,
-            capture_output=True,
-            text=True,
-            input=input_text,
-            timeout=30
+class RateLimiter:
+    """
+    Token bucket limiting how often requests start, shared by all tasks.
+    
+    Tokens refill continuously at rps per second up to capacity. The
+    default capacity of 1 spaces requests evenly, so no one-second window
+    exceeds the NCBI limit even at startup.
+    """
+    
+    def __init__(self, rps: float, capacity: float = 1.0):
+        self.rps = rps
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last = time.monotonic()
+    
+    async def acquire(self):
+        """Wait until a token is available, then consume it."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rps)
+            self.last = now
+            # No await between the check and the decrement, so tasks cannot race
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rps)
+
+
+_rate_limiter = RateLimiter(REQUESTS_PER_SECOND)
+
+
+class ResponseCache:
+    """
+    On-disk cache of NCBI results keyed by (operation, PMID).
+    
+    Values are stored as zlib-compressed JSON so reruns (e.g. while tuning
+    weighting parameters) skip the network for anything fetched recently.
+    """
+    
+    def __init__(self, path: Path, ttl_days: float):
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value BLOB, ts INTEGER)"
         )
-        return result.stdout, result.returncode
-    except subprocess.TimeoutExpired:
-        log(f"Warning: Command timeout: {' '.join(cmd)}")
-        return "", 1
-    except Exception as e:
-        log(f"Error running command: {e}")
-        return "", 1
+        self.ttl_seconds = ttl_days * 86400
+    
+    def get_many(self, op: str, pmids: List[int]) -> Dict[int, object]:
+        """Return cached values for PMIDs that have unexpired entries."""
+        cutoff = time.time() - self.ttl_seconds
+        results = {}
+        for pmid in pmids:
+            row = self.conn.execute(
+                "SELECT value FROM kv WHERE key = ? AND ts >= ?",
+                (f"{op}:{pmid}", cutoff)
+            ).fetchone()
+            if row:
+                results[pmid] = json.loads(zlib.decompress(row[0]))
+        return results
+    
+    def put_many(self, op: str, values: Dict[int, object]):
+        """Store values for each PMID, replacing any existing entries."""
+        now = int(time.time())
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO kv (key, value, ts) VALUES (?, ?, ?)",
+                [
+                    (f"{op}:{pmid}", zlib.compress(json.dumps(value).encode()), now)
+                    for pmid, value in values.items()
+                ]
+            )
+    
+    def close(self):
+        self.conn.close()
 
 
-def get_related_pmids(seed_pmid: int) -> List[int]:
-    """Get PMIDs of papers related to seed_pmid using elink."""
-    try:
-        # Use elink to get related articles, then efetch to get UIDs
-        elink_cmd = ["elink", "-db", "pubmed", "-id", str(seed_pmid), "-related"]
-        stdout, code = run_command(elink_cmd)
-        if code != 0 or not stdout:
-            return []
+def content_hits(content: str) -> Set[str]:
+    """Return the names of the CONTENT_PATTERNS groups that match content."""
+    hits = set()
+    if _CONTENT_DB is not None:
+        _CONTENT_DB.scan(
+            content.encode(),
+            match_event_handler=lambda id, *_: hits.add(_CONTENT_NAMES[id])
+        )
+        return hits
+    
+    match = _CONTENT_RE.search(content)
+    while match and len(hits) < len(_CONTENT_RES):
+        # The alternation reports one group per position, so test the others
+        # anchored here to credit terms shared between groups ("resequenc", "SNP")
+        start = match.start()
+        for name, pattern in _CONTENT_RES.items():
+            if name not in hits and pattern.match(content, start):
+                hits.add(name)
+        match = _CONTENT_RE.search(content, start + 1)
+    return hits
+
+
+def make_session() -> aiohttp.ClientSession:
+    """Create an HTTP session that reuses TCP/TLS connections to NCBI."""
+    connector = aiohttp.TCPConnector(limit=HTTP_POOL_SIZE, ttl_dns_cache=300)
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=aiohttp.ClientTimeout(total=30)
+    )
+
+
+async def eutils_request(
+    session: aiohttp.ClientSession,
+    method: str,
+    endpoint: str,
+    **kwargs
+) -> bytes:
+    """
+    Send a request to an E-utilities endpoint and return the response body.
+    
+    Every attempt waits its turn on the shared rate limiter. Rate-limit
+    (429) and server (5xx) responses and connection errors are retried
+    with exponential backoff (1s, 2s, 4s, 8s plus jitter), waiting at
+    least as long as any Retry-After header asks.
+    """
+    for attempt in range(MAX_RETRIES + 1):
+        retry_after = None
+        await _rate_limiter.acquire()
+        try:
+            async with session.request(method, f"{EUTILS_BASE}/{endpoint}", **kwargs) as response:
+                if response.status not in RETRY_STATUSES:
+                    response.raise_for_status()
+                    return await response.read()
+                reason = f"HTTP {response.status}"
+                retry_after = response.headers.get("Retry-After")
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            reason = str(e) or type(e).__name__
         
-        efetch_cmd = ["efetch", "-format", "uid"]
-        stdout, code = run_command(efetch_cmd, input_text=stdout)
-        if code != 0 or not stdout:
-            return []
+        if attempt == MAX_RETRIES:
+            raise RuntimeError(f"{endpoint} failed after {attempt + 1} attempts ({reason})")
         
-        # Parse UIDs from output
-        pmids = []
-        for line in stdout.strip().split("\n"):
-            line = line.strip().strip('"')
-            if line and line.isdigit():
-                pmids.append(int(line))
-        return pmids
+        delay = 2 ** attempt + random.uniform(0, 1)
+        if retry_after and retry_after.isdigit():
+            delay = max(delay, float(retry_after))
+        log(f"  Retrying {endpoint} in {delay:.1f}s ({reason})")
+        await asyncio.sleep(delay)
+
+
+def chunks(items: List[int], size: int) -> List[List[int]]:
+    """Split items into consecutive lists of at most size elements."""
+    return [items[i:i+size] for i in range(0, len(items), size)]
+
+
+async def fetch_related_batch(
+    session: aiohttp.ClientSession,
+    seed_pmids: List[int]
+) -> Dict[int, List[int]]:
+    """Get PMIDs of papers related to each of seed_pmids with one elink request."""
+    # Repeating id= (rather than comma-joining) returns one linkset per seed
+    data = [
+        ("dbfrom", "pubmed"),
+        ("db", "pubmed"),
+        ("linkname", "pubmed_pubmed"),
+        ("retmode", "json"),
+    ]
+    data.extend(("id", str(pmid)) for pmid in seed_pmids)
+    if NCBI_API_KEY:
+        data.append(("api_key", NCBI_API_KEY))
+    
+    try:
+        payload = json.loads(await eutils_request(
+            session, "POST", "elink.fcgi",
+            data=data,
+            timeout=aiohttp.ClientTimeout(total=60)
+        ))
+        
+        # Each linkset names its seed in ids[] and related UIDs in linksetdbs[].links
+        results = {}
+        for linkset in payload.get("linksets", []):
+            seed = int(linkset["ids"][0])
+            pmids = []
+            for linksetdb in linkset.get("linksetdbs", []):
+                if linksetdb.get("linkname") == "pubmed_pubmed":
+                    pmids.extend(int(uid) for uid in linksetdb.get("links", []))
+            results[seed] = pmids
+        return results
     except Exception as e:
-        log(f"Warning: Failed to get related PMIDs for {seed_pmid}: {e}")
-        return []
+        log(f"Warning: Failed to get related PMIDs for {len(seed_pmids)} seeds: {e}")
+        return {}
 
 
-def fetch_article_metadata(pmids: List[int]) -> Dict[int, Dict[str, str]]:
-    """Fetch article metadata (title, abstract, publication types) for PMIDs."""
+async def query_related_pmids(
+    seed_pmids: List[int],
+    cache: Optional[ResponseCache] = None
+) -> Dict[int, List[int]]:
+    """Query related PMIDs for all seeds in concurrent batches, bounded by NCBI rate limits."""
+    results: Dict[int, List[int]] = {}
+    if cache is not None:
+        results.update(cache.get_many("elink", seed_pmids))
+        if results:
+            log(f"  Using cached results for {len(results)} seeds")
+    
+    # Each seed is requested once, even if listed more than once
+    pending = [seed for seed in dict.fromkeys(seed_pmids) if seed not in results]
+    if not pending:
+        return results
+    
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    completed = 0
+    
+    async with make_session() as session:
+        async def bounded(batch: List[int]) -> Dict[int, List[int]]:
+            nonlocal completed
+            async with semaphore:
+                related = await fetch_related_batch(session, batch)
+            
+            completed += len(batch)
+            pct = (completed * 100) // len(pending)
+            log(f"  Progress: {completed}/{len(pending)} ({pct}%)")
+            return related
+        
+        tasks = [bounded(batch) for batch in chunks(pending, ELINK_BATCH_SIZE)]
+        for related in await asyncio.gather(*tasks):
+            if cache is not None:
+                cache.put_many("elink", related)
+            results.update(related)
+    
+    return results
+
+
+def parse_medline(text: str, pmids: Set[int]) -> Dict[int, Dict[str, str]]:
+    """Extract title, abstract, and publication types for PMIDs from MEDLINE text."""
     results = {}
+    record: Dict[str, List[str]] = {}
+    tag = None
+    
+    def save_record():
+        pmid_values = record.get("PMID")
+        if pmid_values and int(pmid_values[0]) in pmids:
+            results[int(pmid_values[0])] = {
+                "title": " ".join(record.get("TI", [])),
+                "abstract": " ".join(record.get("AB", [])),
+                "pubtypes": ";".join(record.get("PT", []))
+            }
     
+    # Fields are "TAG - value" with the tag padded to 4 characters; lines
+    # indented by 6 spaces continue the previous field; blank lines end a record
+    for line in text.splitlines():
+        if not line.strip():
+            save_record()
+            record = {}
+            tag = None
+        elif line.startswith("      "):
+            if tag is not None:
+                record[tag][-1] += " " + line.strip()
+        elif line[4:6] == "- ":
+            tag = line[:4].rstrip()
+            record.setdefault(tag, []).append(line[6:].strip())
+    
+    # Save last record
+    save_record()
+    
+    return results
+
+
+async def epost_pmids(session: aiohttp.ClientSession, pmids: List[int]) -> Tuple[str, str]:
+    """Upload PMIDs to the NCBI history server and return (WebEnv, query_key)."""
+    data = {"db": "pubmed", "id": ",".join(str(p) for p in pmids)}
+    if NCBI_API_KEY:
+        data["api_key"] = NCBI_API_KEY
+    
+    root = ET.fromstring(await eutils_request(
+        session, "POST", "epost.fcgi",
+        data=data,
+        timeout=aiohttp.ClientTimeout(total=60)
+    ))
+    
+    web_env = root.findtext("WebEnv")
+    query_key = root.findtext("QueryKey")
+    if not web_env or not query_key:
+        raise ValueError(f"epost returned no history: {root.findtext('ERROR')}")
+    return web_env, query_key
+
+
+async def fetch_article_metadata(
+    session: aiohttp.ClientSession,
+    web_env: str,
+    query_key: str,
+    retstart: int
+) -> bytes:
+    """Fetch one page of PubMed MEDLINE records from a history server query."""
+    params = {
+        "db": "pubmed",
+        "WebEnv": web_env,
+        "query_key": query_key,
+        "retstart": str(retstart),
+        "retmax": str(EFETCH_BATCH_SIZE),
+        "rettype": "medline",
+        "retmode": "text",
+    }
+    if NCBI_API_KEY:
+        params["api_key"] = NCBI_API_KEY
+    
+    return await eutils_request(
+        session, "GET", "efetch.fcgi",
+        params=params,
+        timeout=aiohttp.ClientTimeout(total=120)
+    )
+
+
+async def query_article_metadata(pmids: List[int]) -> Dict[int, Dict[str, str]]:
+    """Fetch article metadata (title, abstract, publication types) for PMIDs."""
+    results: Dict[int, Dict[str, str]] = {}
     if not pmids:
         return results
     
-    try:
-        # Convert to comma-separated string
-        ids = ",".join(str(p) for p in pmids)
-        
-        # Use efetch with XML format to get detailed metadata
-        cmd = [
-            "efetch", "-db", "pubmed", "-id", ids, "-format", "xml"
-        ]
-        stdout, code = run_command(cmd)
-        
-        if code != 0 or not stdout:
+    wanted = set(pmids)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+    
+    async with make_session() as session:
+        try:
+            web_env, query_key = await epost_pmids(session, pmids)
+        except Exception as e:
+            log(f"Warning: Failed to post PMIDs to history server: {e}")
             return results
         
-        # Parse XML to extract PMID, Title, Abstract, PublicationTypes
-        current_pmid = None
-        current_title = ""
-        current_abstract = ""
-        current_pubtypes = ""
-        
-        for line in stdout.split("\n"):
-            # Extract PMID
-            pmid_match = re.search(r"<PMID[^>]*>(\d+)</PMID>", line)
-            if pmid_match:
-                # Save previous record if exists
-                if current_pmid and current_pmid in pmids:
-                    results[current_pmid] = {
-                        "title": current_title,
-                        "abstract": current_abstract,
-                        "pubtypes": current_pubtypes
-                    }
-                current_pmid = int(pmid_match.group(1))
-                current_title = ""
-                current_abstract = ""
-                current_pubtypes = ""
-            
-            # Extract Title
-            title_match = re.search(r"<ArticleTitle>([^<]*)</ArticleTitle>", line)
-            if title_match:
-                current_title = title_match.group(1)
-            
-            # Extract Abstract text
-            abstract_match = re.search(r"<AbstractText[^>]*>([^<]*)</AbstractText>", line)
-            if abstract_match:
-                current_abstract += abstract_match.group(1) + " "
-            
-            # Extract Publication Types
-            pubtype_match = re.search(r"<PublicationType[^>]*>([^<]*)</PublicationType>", line)
-            if pubtype_match:
-                if current_pubtypes:
-                    current_pubtypes += ";"
-                current_pubtypes += pubtype_match.group(1)
-        
-        # Save last record
-        if current_pmid and current_pmid in pmids:
-            results[current_pmid] = {
-                "title": current_title,
-                "abstract": current_abstract,
-                "pubtypes": current_pubtypes
-            }
+        async def bounded(retstart: int) -> Dict[int, Dict[str, str]]:
+            async with semaphore:
+                try:
+                    data = await fetch_article_metadata(session, web_env, query_key, retstart)
+                    page = parse_medline(data.decode("utf-8", errors="replace"), wanted)
+                except Exception as e:
+                    log(f"Warning: Failed to fetch metadata for records from {retstart}: {e}")
+                    page = {}
+            return page
         
-        return results
-    except Exception as e:
-        log(f"Warning: Failed to fetch metadata: {e}")
-        return results
+        tasks = [bounded(retstart) for retstart in range(0, len(pmids), EFETCH_BATCH_SIZE)]
+        for page in await asyncio.gather(*tasks):
+            results.update(page)
+    
+    return results
 
 
 def filter_candidates(
-    candidates: Dict[int, List[int]],
+    candidates: Dict[int, array],
     require_pos: bool = True,
     assembly_only_exclude: bool = True,
-    comparative_boost: float = 1.15
-) -> Tuple[Dict[int, List[int]], Dict[int, bool]]:
+    comparative_boost: float = 1.15,
+    cache: Optional[ResponseCache] = None,
+    min_seeds: int = 1
+) -> Tuple[Dict[int, array], Dict[int, bool]]:
     """
     Filter candidates based on content criteria.
     
+    Candidates found by fewer than min_seeds seeds are kept without
+    fetching their metadata, since that is the most expensive step.
+    
     Returns:
         (filtered_candidates, comparative_hits)
     """
     
-    # Regex patterns
-    pos_patterns = r"whole[\s\-]?genome|WGS|resequenc"
-    neg_patterns = r"0K-exome|targeted|amplicon|panel|GBS|genotyping(\s+by\s+sequencing)?|GenomeStudio|SNP([\s\-]?array)?|microarray|Infinium|Axiom|expression|transcriptome|RNA[\s\-]?seq|mRNA|SSR(s)?|microsatellite|RAD[\s\-]?seq|ddRAD|SLAF|reduced\s+representation|capture|hybrid[\s\-]?capture|chloroplast|mitochondri|mitochondrial\s+genome|plastid|plastome|mitogenome"
-    excl_pt = r"Review|Editorial|Letter|Meta-Analysis|News|Comment"
-    comparative_patterns = r"variant|polymorphism|SNP|indel|SV|structural\s+variant|copy\s+number|CNV|haplotype|diversity|population|comparative|resequenc|association|GWAS|selection|adaptation|introgression|domestication|pangenome|pan[\s\-]?genome|phylogeny|evolution"
-    
     comparative_hits = {}
-    pmids_to_process = list(candidates.keys())
+    pmids_to_process = [
+        pmid for pmid, seeds in candidates.items()
+        if len(seeds) >= min_seeds
+    ]
+    skipped = len(candidates) - len(pmids_to_process)
+    if skipped:
+        log(f"Skipping content filter for {skipped} candidates with fewer than {min_seeds} seeds")
     
-    # Fetch metadata in batches
-    batch_size = 200
     metadata = {}
-    for i in range(0, len(pmids_to_process), batch_size):
-        batch = pmids_to_process[i:i+batch_size]
-        batch_metadata = fetch_article_metadata(batch)
-        metadata.update(batch_metadata)
+    if cache is not None:
+        metadata.update(cache.get_many("efetch", pmids_to_process))
+        if metadata:
+            log(f"Using cached metadata for {len(metadata)} candidates")
+    
+    # Fetch remaining metadata through the history server
+    pmids_to_fetch = [pmid for pmid in pmids_to_process if pmid not in metadata]
+    fetched = asyncio.run(query_article_metadata(pmids_to_fetch))
+    if cache is not None:
+        cache.put_many("efetch", fetched)
+    metadata.update(fetched)
     
     # Filter
     filtered = {}
@@ -237,7 +549,7 @@ def filter_candidates(
     
     for pmid, seeds in candidates.items():
         if pmid not in metadata:
-            # If we couldn't fetch metadata, keep it anyway
+            # If metadata was skipped or couldn't be fetched, keep it anyway
             filtered[pmid] = seeds
             continue
         
@@ -245,30 +557,31 @@ def filter_candidates(
         content = f"{meta['title']} {meta['abstract']}".lower()
         pubtypes = meta['pubtypes'].lower()
         
+        hits = content_hits(content)
+        
         # Check comparative patterns
-        if re.search(comparative_patterns, content, re.IGNORECASE):
+        if "comp" in hits:
             comparative_hits[pmid] = True
         
         # Exclude assembly-only papers if enabled
         if assembly_only_exclude:
-            if re.search(r"(de[\s\-]?novo\s+)?assembly|genome\s+assembly", content, re.IGNORECASE):
-                if pmid not in comparative_hits:
-                    removed_count += 1
-                    continue
+            if "asm" in hits and pmid not in comparative_hits:
+                removed_count += 1
+                continue
         
         # Exclude unwanted publication types
-        if pubtypes and re.search(excl_pt, pubtypes, re.IGNORECASE):
+        if pubtypes and _EXCL_PT_RE.search(pubtypes):
             removed_count += 1
             continue
         
         # Exclude if negative patterns present
-        if re.search(neg_patterns, content, re.IGNORECASE):
+        if "neg" in hits:
             removed_count += 1
             continue
         
         # Optionally require positive WGS terms
         if require_pos:
-            if not re.search(pos_patterns, content, re.IGNORECASE):
+            if "pos" not in hits:
                 removed_count += 1
                 continue
         
@@ -316,6 +629,19 @@ def main():
         default=1.15,
         help="Score multiplier for comparative studies (default: 1.15)"
     )
+    parser.add_argument(
+        "--min-seed-prefilter",
+        type=int,
+        default=2,
+        help="Only fetch metadata and content-filter candidates found by at least "
+             "this many seeds; others are kept unfiltered (default: 2)"
+    )
+    parser.add_argument(
+        "--cache-ttl",
+        type=float,
+        default=7,
+        help="Days to reuse cached NCBI responses; 0 always refetches (default: 7)"
+    )
     
     args = parser.parse_args()
     
@@ -323,9 +649,9 @@ def main():
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
-    include_set = set(INCLUDE_PMIDS)
-    exclude_set = set(EXCLUDE_PMIDS)
     seeds_to_process = INCLUDE_PMIDS[:args.max_seeds] if args.max_seeds else INCLUDE_PMIDS
+    seeds_to_process = list(dict.fromkeys(seeds_to_process))
+    cache = ResponseCache(output_dir / CACHE_FILENAME, args.cache_ttl)
     
     log("=== PubMed Iterative Expansion ===")
     log(f"Using {len(seeds_to_process)} papers as seeds")
@@ -335,33 +661,30 @@ def main():
     # PHASE 1: Query similar articles for each seed
     # ========================================================================
     log("Querying PubMed (this will take a while)...")
-    log("Progress will be shown every 10 papers")
+    log(f"Progress will be shown every {ELINK_BATCH_SIZE} papers")
     
-    candidate_seeds: Dict[int, List[int]] = defaultdict(list)  # PMID -> [seed_pmids]
+    # PMID -> seed PMIDs, as compact uint32 arrays rather than lists of ints
+    candidate_seeds: Dict[int, array] = defaultdict(lambda: array("I"))
     
-    for idx, seed in enumerate(seeds_to_process, 1):
-        if idx % 10 == 0:
-            pct = (idx * 100) // len(seeds_to_process)
-            log(f"  Progress: {idx}/{len(seeds_to_process)} ({pct}%)")
-        
-        related = get_related_pmids(seed)
-        
-        for pmid in related:
-            # Skip if in include or exclude sets
-            if pmid in include_set or pmid in exclude_set:
-                continue
-            # Skip if older than cutoff
-            if pmid < MIN_PMID:
-                continue
-            # Add to candidates
+    related_by_seed = asyncio.run(query_related_pmids(seeds_to_process, cache))
+    
+    for seed in seeds_to_process:
+        related = np.asarray(related_by_seed.get(seed, []), dtype=np.int64)
+        # Skip if older than cutoff or in include or exclude lists
+        keep = (related >= MIN_PMID) & ~np.isin(related, KNOWN_PMIDS)
+        # Add to candidates
+        for pmid in related[keep].tolist():
             candidate_seeds[pmid].append(seed)
-        
-        # Rate limiting
-        import time
-        time.sleep(0.5)
     
     log(f"Complete: {len(seeds_to_process)}/{len(seeds_to_process)} (100%)")
     
+    # Report seeds whose requests failed after all retries; they are not
+    # cached, so a rerun will query only these
+    failed_seeds = [seed for seed in seeds_to_process if seed not in related_by_seed]
+    if failed_seeds:
+        log(f"Warning: No related articles retrieved for {len(failed_seeds)} seeds:")
+        log(f"  {' '.join(str(seed) for seed in failed_seeds)}")
+    
     if not candidate_seeds:
         log("Error: No similar articles found. Check your network connection.")
         sys.exit(1)
@@ -371,22 +694,23 @@ def main():
     # ========================================================================
     # PHASE 2: Calculate raw scores (number of seeds per candidate)
     # ========================================================================
-    candidate_scores: Dict[int, int] = {}
-    for pmid, seeds in candidate_seeds.items():
-        candidate_scores[pmid] = len(seeds)
+    candidate_scores: Counter = Counter(
+        {pmid: len(seeds) for pmid, seeds in candidate_seeds.items()}
+    )
     
     # ========================================================================
     # PHASE 3: Content filtering
     # ========================================================================
     log("Filtering by content...")
     candidate_seeds, comparative_hits = filter_candidates(
-        dict(candidate_seeds)
+        dict(candidate_seeds),
+        cache=cache,
+        min_seeds=args.min_seed_prefilter
+    )
+    cache.close()
+    candidate_scores = Counter(
+        {pmid: candidate_scores[pmid] for pmid in candidate_seeds.keys()}
     )
-    candidate_scores = {
-        pmid: candidate_scores[pmid]
-        for pmid in candidate_seeds.keys()
-        if pmid in candidate_scores
-    }
     
     # ========================================================================
     # PHASE 4: Apply age weighting and comparative boost
@@ -395,23 +719,23 @@ def main():
         log("Error: No candidates after filtering")
         sys.exit(1)
     
+    # Work on flat arrays so weighting is vectorized across all candidates
+    pmids = np.fromiter(candidate_scores.keys(), dtype=np.int64, count=len(candidate_scores))
+    scores = np.fromiter(candidate_scores.values(), dtype=np.int64, count=len(candidate_scores))
+    
     # Compute min/max PMIDs for age normalization
-    max_pmid = max(candidate_scores.keys())
-    min_pmid = min(candidate_scores.keys())
-    
-    weighted_scores: Dict[int, float] = {}
-    for pmid, score in candidate_scores.items():
-        if max_pmid == min_pmid:
-            weighted = float(score)
-        else:
-            age_norm = (max_pmid - pmid) / (max_pmid - min_pmid)
-            weighted = score * (1 - args.age_beta * (age_norm ** args.age_gamma))
-        
-        # Apply comparative boost if applicable
-        if pmid in comparative_hits:
-            weighted *= args.comparative_boost
-        
-        weighted_scores[pmid] = weighted
+    max_pmid = pmids.max()
+    min_pmid = pmids.min()
+    
+    if max_pmid == min_pmid:
+        weighted = scores.astype(np.float64)
+    else:
+        age_norm = (max_pmid - pmids) / (max_pmid - min_pmid)
+        weighted = scores * (1 - args.age_beta * np.power(age_norm, args.age_gamma))
+    
+    # Apply comparative boost if applicable
+    comparative_mask = np.isin(pmids, np.fromiter(comparative_hits, dtype=np.int64))
+    weighted[comparative_mask] *= args.comparative_boost
     
     log(f"Age weighting parameters: AGE_BETA={args.age_beta}, AGE_GAMMA={args.age_gamma}")
     log(f"Comparative boost factor: {args.comparative_boost}")
@@ -429,9 +753,7 @@ def main():
     
     # Score distribution
     log("Score Distribution (how many seeds found each candidate):")
-    score_counts = defaultdict(int)
-    for score in candidate_scores.values():
-        score_counts[score] += 1
+    score_counts = Counter(candidate_scores.values())
     
     for score in sorted(score_counts.keys(), reverse=True):
         count = score_counts[score]
@@ -443,37 +765,35 @@ def main():
     log("")
     log("=== OUTPUT FILES ===")
     
+    # Collect candidates in one table, sorted by weighted score (desc),
+    # then raw score (desc), then PMID (asc)
+    ranked = pd.DataFrame({
+        "PMID": pmids,
+        "Score": scores,
+        "WeightedScore": weighted,
+    })
+    ranked.sort_values(
+        ["WeightedScore", "Score", "PMID"],
+        ascending=[False, False, True],
+        inplace=True
+    )
+    ranked["Seeds"] = [
+        ",".join(map(str, candidate_seeds[pmid])) for pmid in ranked["PMID"].tolist()
+    ]
+    
     # Create threshold files
     for threshold in [2, 3, 5, 10, recommended_threshold]:
         if threshold <= max_score:
             outfile = output_dir / f"candidates_min{threshold}_seeds.txt"
-            with open(outfile, "w") as f:
-                pmids = [
-                    pmid for pmid, score in candidate_scores.items()
-                    if score >= threshold
-                ]
-                for pmid in sorted(pmids):
-                    f.write(f"{pmid}\n")
+            threshold_pmids = ranked.loc[ranked["Score"] >= threshold, "PMID"].sort_values()
+            threshold_pmids.to_csv(outfile, index=False, header=False)
             
-            count = len(pmids)
+            count = len(threshold_pmids)
             log(f"  candidates_min{threshold}_seeds.txt: {count} candidates (≥{threshold} seeds)")
     
     # Create ranked list with full details
     ranked_file = output_dir / "candidates_ranked.txt"
-    with open(ranked_file, "w") as f:
-        f.write("PMID\tScore\tWeightedScore\tSeeds\n")
-        
-        # Sort by weighted score (desc), then raw score (desc), then PMID (asc)
-        sorted_pmids = sorted(
-            candidate_scores.keys(),
-            key=lambda p: (-weighted_scores[p], -candidate_scores[p], p)
-        )
-        
-        for pmid in sorted_pmids:
-            score = candidate_scores[pmid]
-            weighted = weighted_scores[pmid]
-            seeds = ",".join(str(s) for s in candidate_seeds[pmid])
-            f.write(f"{pmid}\t{score}\t{weighted:.6f}\t{seeds}\n")
+    ranked.to_csv(ranked_file, sep="\t", index=False, float_format="%.6f")
     
     log(f"  candidates_ranked.txt: All {len(candidate_seeds)} candidates with weighted and raw scores")
     log("")
@@ -2,14 +2,31 @@
 """
 Search for terms in markdown files and report counts.
 Usage: ./search_terms.py <directory_with_markdown_files> <terms_file>
+
+Uses the optional hyperscan package for scanning when it is installed.
 """
 
 import sys
 import argparse
+import mmap
 import re
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import hyperscan
+except ImportError:  # Optional; scanning falls back to re
+    hyperscan = None
+
+
+# Scan IDs pack (group index, pattern index) as group << PATTERN_ID_BITS | pattern
+PATTERN_ID_BITS = 16
+
+# Per-process scanner, set up by _init_scanner in each worker
+_scanner = None
+
 
 def log(msg):
     """Print log message with timestamp."""
@@ -55,40 +72,105 @@ def read_search_terms(terms_file):
     return term_groups
 
 
-def search_files(directory, pattern, case_insensitive=True, whole_word=True):
+def pattern_id(group_idx, pattern_idx):
+    """Pack a term group index and pattern index into a single scan ID."""
+    return (group_idx << PATTERN_ID_BITS) | pattern_idx
+
+
+def build_scanner(term_groups, case_insensitive=True, whole_word=True):
     """
-    Search for pattern in all markdown files.
-    Returns set of matching file paths.
+    Compile every pattern in term_groups for scanning a file in one pass.
+    Returns a function mapping file bytes (or an mmap) to the set of
+    matching scan IDs.
     """
-    markdown_dir = Path(directory)
-    if not markdown_dir.is_dir():
-        raise FileNotFoundError(f"Directory not found: {directory}")
+    ids = []
+    regex_patterns = []
+    for group_idx, (_, patterns) in enumerate(term_groups):
+        for pattern_idx, pattern in enumerate(patterns):
+            # Build bytes regex pattern with word boundaries
+            if whole_word:
+                regex_pattern = rb'\b' + re.escape(pattern.encode()) + rb'\b'
+            else:
+                regex_pattern = re.escape(pattern.encode())
+            ids.append(pattern_id(group_idx, pattern_idx))
+            regex_patterns.append(regex_pattern)
     
-    # Build regex pattern with word boundaries
-    if whole_word:
-        regex_pattern = r'\b' + re.escape(pattern) + r'\b'
-    else:
-        regex_pattern = re.escape(pattern)
+    if hyperscan is not None:
+        # One database reports every matching pattern in a single linear scan
+        flags = hyperscan.HS_FLAG_SINGLEMATCH
+        if case_insensitive:
+            flags |= hyperscan.HS_FLAG_CASELESS
+        db = hyperscan.Database()
+        db.compile(
+            expressions=regex_patterns,
+            ids=ids,
+            flags=[flags] * len(ids)
+        )
+        
+        def scan(data):
+            matched = set()
+            db.scan(data, match_event_handler=lambda id, *_: matched.add(id))
+            return matched
+        
+        return scan
     
     flags = re.IGNORECASE if case_insensitive else 0
-    try:
-        compiled_pattern = re.compile(regex_pattern, flags)
-    except re.error as e:
-        log(f"Error compiling regex pattern '{pattern}': {e}")
-        return set()
+    compiled_patterns = []
+    for scan_id, regex_pattern in zip(ids, regex_patterns):
+        try:
+            compiled_patterns.append((scan_id, re.compile(regex_pattern, flags)))
+        except re.error as e:
+            log(f"Error compiling regex pattern '{regex_pattern}': {e}")
     
-    matching_files = set()
+    def scan(data):
+        return {
+            scan_id for scan_id, compiled_pattern in compiled_patterns
+            if compiled_pattern.search(data)
+        }
     
-    for md_file in markdown_dir.glob('**/*.md'):
-        try:
-            with open(md_file, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                if compiled_pattern.search(content):
-                    matching_files.add(md_file)
-        except (OSError, IOError) as e:
-            log(f"Warning: Skipping file {md_file}: {e}")
-        except Exception as e:
-            log(f"Warning: Error reading file {md_file}: {e}")
+    return scan
+
+
+def _init_scanner(term_groups, case_insensitive, whole_word):
+    """Build the pattern scanner once in each worker process."""
+    global _scanner
+    _scanner = build_scanner(term_groups, case_insensitive, whole_word)
+
+
+def _scan_one(md_file):
+    """Return the set of scan IDs matching a single file."""
+    try:
+        # Empty files cannot be mapped and cannot match
+        if md_file.stat().st_size == 0:
+            return set()
+        # Scan the mapped file directly; pages are read in on demand
+        with open(md_file, 'rb') as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _scanner(mm)
+    except (OSError, IOError) as e:
+        log(f"Warning: Skipping file {md_file}: {e}")
+    except Exception as e:
+        log(f"Warning: Error reading file {md_file}: {e}")
+    return set()
+
+
+def search_files(md_files, term_groups, case_insensitive=True, whole_word=True):
+    """
+    Search for every pattern in term_groups across the given markdown files.
+    Each file is read once and scanned for all patterns together, with
+    files spread across a pool of worker processes.
+    Returns dict mapping scan ID (see pattern_id) to set of matching file paths.
+    """
+    matching_files = defaultdict(set)
+    
+    with ProcessPoolExecutor(
+        initializer=_init_scanner,
+        initargs=(term_groups, case_insensitive, whole_word)
+    ) as executor:
+        results = executor.map(_scan_one, md_files, chunksize=64)
+        for md_file, scan_ids in zip(md_files, results):
+            for scan_id in scan_ids:
+                matching_files[scan_id].add(md_file)
     
     return matching_files
 
@@ -125,8 +207,9 @@ def main():
         log("Expected format: 'Display Name: pattern1|pattern2|pattern3'")
         sys.exit(1)
     
-    # Count total markdown files
-    total_files = len(list(markdown_dir.glob('**/*.md')))
+    # List markdown files once; the same list is counted and searched
+    md_files = list(markdown_dir.rglob('*.md'))
+    total_files = len(md_files)
     if total_files == 0:
         log(f"Error: No markdown files found in {args.directory}")
         sys.exit(1)
@@ -134,20 +217,20 @@ def main():
     log(f"Searching {total_files} markdown files in: {args.directory}")
     log(f"Searching for {len(term_groups)} term groups")
     
-    # Search for each term group
+    # Scan all files for every pattern at once
+    files_by_pattern = search_files(md_files, term_groups)
     term_counts = {}
     
-    for display_name, patterns in term_groups:
+    for group_idx, (display_name, patterns) in enumerate(term_groups):
         matching_files = set()
         
-        for pattern in patterns:
+        for pattern_idx, pattern in enumerate(patterns):
+            files = files_by_pattern.get(pattern_id(group_idx, pattern_idx), set())
             if args.dry_run:
                 log(f"Files matching pattern: '{pattern}' (group: '{display_name}')")
-                files = search_files(args.directory, pattern)
                 for f in sorted(files):
                     print(f)
             else:
-                files = search_files(args.directory, pattern)
                 matching_files.update(files)
         
         if not args.dry_run: